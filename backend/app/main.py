@@ -1,14 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+import asyncio
+import importlib
+import logging
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def log_preload_result(future):
+    """Surface preload failures - nothing else awaits the executor future."""
+    error = None if future.cancelled() else future.exception()
+    if error is not None:
+        logger.error(f"Warm-up failed: {error!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_environment()
+    preload = None
+    # Runs in a worker thread so the server starts accepting requests right away
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        preload = asyncio.get_running_loop().run_in_executor(None, preload_dependencies)
+        preload.add_done_callback(log_preload_result)
+    # Referenced from app state so the preload isn't dropped mid-flight
+    app.state.preload = preload
+    yield
+
+
 app = FastAPI(
     title="StudyQuiz API",
     description="Backend for StudyQuiz - AI-powered quiz platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS configuration - allow all origins for flexibility
@@ -20,12 +50,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Import routers
+# Brotli/gzip for large JSON payloads (upload responses carry full chapter text)
+from app.utils.compression import CompressionMiddleware
+
+app.add_middleware(CompressionMiddleware)
+
+# Import routers (parsers and the Groq SDK are imported lazily on first use)
 from app.routers import documents, quiz
+from app.services.groq_service import check_environment
+from app.utils.pdf_parser import ocr_available
 
 app.include_router(documents.router, prefix="/api", tags=["Documents"])
 app.include_router(quiz.router, prefix="/api", tags=["Quiz"])
 
+# Heavy optional dependencies preloaded in the background after startup
+WARMUP_MODULES = ["PyPDF2", "groq"]
+
+
+def preload_dependencies():
+    """
+    Import parser and LLM dependencies so the first request doesn't pay for them.
+    """
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Warm-up could not import {name}: {e}")
+    ocr_available()
+    logger.info("Warm-up finished")
+
+
 @app.get("/")
 async def root():
     return {"message": "StudyQuiz API is running", "version": "1.0.0"}
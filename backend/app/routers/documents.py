@@ -1,19 +1,28 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import List
 import tempfile
 import os
 
 from app.utils.pdf_parser import extract_text_from_pdf
 from app.utils.docx_parser import extract_text_from_docx
+from app.services.quiz_pool import chapter_id, enqueue_chapters
 
 router = APIRouter()
 
+# Opt-in: warm per-chapter question pools in the background after upload.
+# The env flag enables the feature; clients opt in per upload with ?pregenerate=true
+PREGENERATE_QUIZZES = os.getenv("PREGENERATE_QUIZZES", "false").lower() == "true"
+
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(file: UploadFile = File(...), pregenerate: bool = False):
     """
     Upload and parse a document (PDF, DOCX, TXT).
     Returns extracted text with detected chapters.
+    With pregenerate (and PREGENERATE_QUIZZES enabled), question pools for each
+    chapter are generated while the server is idle.
     """
+    pregenerate = pregenerate and PREGENERATE_QUIZZES
     # Validate file type
     allowed_types = [
         "application/pdf",
@@ -55,12 +64,23 @@ async def upload_document(file: UploadFile = File(...)):
                 "chapters": chapters
             }
         
-        return {
+        # Content-derived ids, so question bank entries don't collide across same-named uploads
+        document_id = chapter_id(result["text"])
+        for chapter in result["chapters"]:
+            chapter["id"] = chapter_id(chapter["content"])
+        
+        if pregenerate:
+            enqueue_chapters(result["chapters"], document_id=document_id, document=file.filename)
+        
+        # Returned as a response directly so multi-MB chapter text skips jsonable_encoder
+        return ORJSONResponse({
             "filename": file.filename,
+            "document_id": document_id,
             "total_chars": len(result["text"]),
             "chapters": result["chapters"],
-            "full_text": result["text"][:1000] + "..." if len(result["text"]) > 1000 else result["text"]
-        }
+            "full_text": result["text"][:1000] + "..." if len(result["text"]) > 1000 else result["text"],
+            "pregenerating": pregenerate
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import bisect
 import logging
+import time
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 from app.services.groq_service import generate_quiz, generate_explanation
+from app.services.rate_limiter import LLMUnavailableError
+from app.services.quiz_pool import interactive_request, sample_from_pool, chapter_id, locate_chapters
+from app.services import question_bank
 
 router = APIRouter()
 
@@ -17,6 +24,13 @@ class QuizRequest(BaseModel):
     difficulty: str = "medium"  # easy, medium, hard
     num_questions: int = 10
     chapters: Optional[List[str]] = None
+    token_budget: Optional[int] = None  # max prompt tokens of content per chunk
+    chapter_ids: Optional[List[str]] = None  # ids from /api/upload, enables pool sampling
+    use_bank: bool = False  # fill from the question bank first, LLM only for the shortfall
+    bank_scope: str = "chapters"  # chapters, document or topic (see question_bank.fetch_questions)
+    topic: Optional[str] = None  # question bank filter
+    document_id: Optional[str] = None  # document_id from /api/upload
+    document: Optional[str] = None  # source filename, stored for display only
 
 
 class ExplanationRequest(BaseModel):
@@ -37,6 +51,72 @@ class QuizResponse(BaseModel):
     num_questions: int
 
 
+def store_in_bank(request: "QuizRequest", questions: List[dict], served_at: float = 0):
+    """
+    Bank generated questions under the chapter each came from, with offsets into
+    that chapter. Falls back to the whole content's id when the selected chapters
+    can't be located in the content. served_at marks questions already sent to the
+    user so the bank doesn't serve them again right away.
+    Blocking - run with asyncio.to_thread.
+    """
+    located = None
+    if request.chapter_ids:
+        located = locate_chapters(request.content, request.chapter_ids)
+    if not located:
+        located = [(chapter_id(request.content), 0, len(request.content))]
+
+    titles = request.chapters if request.chapters and len(request.chapters) == len(located) else None
+    starts = [start for _, start, _ in located]
+    groups = {}
+    for q in questions:
+        index = max(0, bisect.bisect_right(starts, q.get("chunk_start", 0)) - 1)
+        _, start, end = located[index]
+        groups.setdefault(index, []).append({
+            **q,
+            "chunk_start": q.get("chunk_start", start) - start,
+            "chunk_end": min(q.get("chunk_end", end), end) - start
+        })
+
+    for index, chapter_questions in groups.items():
+        question_bank.store_questions(
+            chapter_questions,
+            difficulty=request.difficulty,
+            chapter_id=located[index][0],
+            chapter=titles[index] if titles else None,
+            document_id=request.document_id,
+            document=request.document,
+            served_at=served_at
+        )
+
+
+def record_served(request: "QuizRequest", banked: List[dict], generated: List[dict]):
+    """
+    Mark banked questions as served and bank the generated ones as served, once the
+    whole quiz has been built. Blocking - run with asyncio.to_thread.
+    """
+    now = time.time()
+    if banked:
+        question_bank.mark_served([q["id"] for q in banked], now)
+    if generated:
+        store_in_bank(request, generated, served_at=now)
+
+
+def quiz_response(questions: List[dict], difficulty: str) -> ORJSONResponse:
+    """
+    Build the QuizResponse payload without pydantic re-validation.
+    Questions were already validated by generate_from_chunk (or when banked/pooled),
+    so only the public fields are copied out.
+    """
+    return ORJSONResponse({
+        "questions": [
+            {"question": q["question"], "options": q["options"], "correct": q["correct"]}
+            for q in questions
+        ],
+        "difficulty": difficulty,
+        "num_questions": len(questions)
+    })
+
+
 @router.post("/quiz/generate", response_model=QuizResponse)
 async def create_quiz(request: QuizRequest):
     """
@@ -72,24 +152,69 @@ async def create_quiz(request: QuizRequest):
             detail="Difficulty must be 'easy', 'medium', or 'hard'."
         )
     
+    if request.token_budget is not None and request.token_budget < 100:
+        logger.error(f"VALIDATION FAILED: Invalid token_budget ({request.token_budget})")
+        raise HTTPException(
+            status_code=400,
+            detail="Token budget must be at least 100 tokens."
+        )
+    
+    if request.bank_scope not in question_bank.SCOPES:
+        logger.error(f"VALIDATION FAILED: Invalid bank_scope ({request.bank_scope})")
+        raise HTTPException(
+            status_code=400,
+            detail="Bank scope must be 'chapters', 'document' or 'topic'."
+        )
+    
+    # Serve instantly from pre-generated pools when every chapter has one
+    pooled = sample_from_pool(request.chapter_ids, request.difficulty, request.num_questions)
+    if pooled:
+        logger.info(f"Served {len(pooled)} questions from pre-generated pools")
+        return quiz_response(pooled, request.difficulty)
+    
     logger.info("Validation passed. Calling generate_quiz...")
     
     try:
-        questions = await generate_quiz(
-            content=request.content,
-            difficulty=request.difficulty,
-            num_questions=request.num_questions
-        )
+        banked = []
+        if request.use_bank:
+            banked = await asyncio.to_thread(
+                question_bank.fetch_questions,
+                difficulty=request.difficulty,
+                num_questions=request.num_questions,
+                # Content id covers questions banked for selections that couldn't be located
+                chapter_ids=(request.chapter_ids or []) + [chapter_id(request.content)],
+                document_id=request.document_id,
+                topic=request.topic,
+                scope=request.bank_scope
+            )
+        
+        questions = []
+        shortfall = request.num_questions - len(banked)
+        if shortfall > 0:
+            async with interactive_request():
+                questions = await generate_quiz(
+                    content=request.content,
+                    difficulty=request.difficulty,
+                    num_questions=shortfall,
+                    token_budget=request.token_budget
+                )
+        
+        # Only now is the quiz certain to be sent
+        await asyncio.to_thread(record_served, request, banked, questions)
+        questions = banked + questions
         
         logger.info(f"SUCCESS! Generated {len(questions)} questions")
         logger.debug(f"Questions: {questions}")
         
-        return QuizResponse(
-            questions=questions,
-            difficulty=request.difficulty,
-            num_questions=len(questions)
-        )
+        return quiz_response(questions, request.difficulty)
         
+    except LLMUnavailableError as e:
+        logger.error(f"QUIZ GENERATION RATE LIMITED / PROVIDER DOWN: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Quiz generation is temporarily unavailable: {str(e)}",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
     except Exception as e:
         logger.error(f"QUIZ GENERATION FAILED!")
         logger.error(f"Error type: {type(e).__name__}")
@@ -111,11 +236,12 @@ async def explain_answer(request: ExplanationRequest):
     logger.info(f"Question: {request.question}")
     
     try:
-        explanation = await generate_explanation(
-            question=request.question,
-            user_answer=request.user_answer,
-            correct_answer=request.correct_answer
-        )
+        async with interactive_request():
+            explanation = await generate_explanation(
+                question=request.question,
+                user_answer=request.user_answer,
+                correct_answer=request.correct_answer
+            )
         
         logger.info(f"Explanation generated successfully")
         
@@ -126,6 +252,13 @@ async def explain_answer(request: ExplanationRequest):
             "explanation": explanation
         }
         
+    except LLMUnavailableError as e:
+        logger.error(f"EXPLANATION RATE LIMITED / PROVIDER DOWN: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Explanations are temporarily unavailable: {str(e)}",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
     except Exception as e:
         logger.error(f"EXPLANATION FAILED: {str(e)}")
         raise HTTPException(
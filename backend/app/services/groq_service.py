@@ -2,9 +2,12 @@ import os
 import json
 import re
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from dotenv import load_dotenv
 
+from app.utils.text_compressor import clean_text_with_offsets, source_offset, compress_to_budget, estimate_tokens
+from app.services.rate_limiter import limiter, LLMUnavailableError
+
 # Load environment variables
 load_dotenv()
 
@@ -12,15 +15,24 @@ load_dotenv()
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Log environment check on module load
-logger.info("=" * 50)
-logger.info("GROQ SERVICE INITIALIZING")
-api_key = os.getenv("GROQ_API_KEY")
-if api_key:
-    logger.info(f"GROQ_API_KEY found: {api_key[:10]}...{api_key[-4:]}")
-else:
-    logger.error("GROQ_API_KEY NOT FOUND IN ENVIRONMENT!")
-logger.info("=" * 50)
+
+def check_environment():
+    """
+    Log whether the Groq API key is configured.
+    Called from the app startup hook rather than at import time.
+    """
+    logger.info("=" * 50)
+    logger.info("GROQ SERVICE INITIALIZING")
+    api_key = os.getenv("GROQ_API_KEY")
+    if api_key:
+        logger.info(f"GROQ_API_KEY found: {api_key[:10]}...{api_key[-4:]}")
+    else:
+        logger.error("GROQ_API_KEY NOT FOUND IN ENVIRONMENT!")
+    logger.info("=" * 50)
+
+
+# Model used for quiz generation
+QUIZ_MODEL = "llama-3.1-8b-instant"
 
 # Initialize Groq client
 client = None
@@ -36,7 +48,8 @@ def get_groq_client():
         
         try:
             from groq import Groq
-            client = Groq(api_key=api_key)
+            # Retries are handled by the shared rate limiter
+            client = Groq(api_key=api_key, max_retries=0)
             logger.info("Groq client created successfully!")
         except Exception as e:
             logger.error(f"Failed to create Groq client: {e}")
@@ -44,10 +57,15 @@ def get_groq_client():
     return client
 
 
-async def generate_quiz(content: str, difficulty: str, num_questions: int) -> List[Dict[str, Any]]:
+async def generate_quiz(content: str, difficulty: str, num_questions: int,
+                        token_budget: Optional[int] = None,
+                        wait_for_capacity: Optional[Callable[[], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
     """
     Generate quiz questions using Groq's Llama model.
     Splits large content into chunks for better coverage.
+    If token_budget is set, each chunk is reduced to its most salient sentences.
+    wait_for_capacity marks a background job: it is awaited before every chunk's
+    LLM call, and the calls use the rate limiter's low-priority path.
     """
     logger.info("generate_quiz() called")
     logger.info(f"Content length: {len(content)}, Difficulty: {difficulty}, Num: {num_questions}")
@@ -59,11 +77,22 @@ async def generate_quiz(content: str, difficulty: str, num_questions: int) -> Li
         logger.error(f"Failed to get Groq client: {e}")
         raise
     
+    # Drop headers/footers, page numbers and OCR noise before chunking
+    cleaned, offsets = clean_text_with_offsets(content)
+    if cleaned:
+        content = cleaned
+    else:
+        offsets = [(0, 0, len(content))]
+    
     # Split content into chunks (15k for fewer API calls)
     CHUNK_SIZE = 15000
     chunks = split_into_chunks(content, CHUNK_SIZE)
+    spans = split_into_spans(content, CHUNK_SIZE)
     logger.info(f"Split content into {len(chunks)} chunks")
     
+    if token_budget:
+        chunks = [compress_to_budget(chunk, token_budget) for chunk in chunks]
+    
     # Distribute questions across chunks
     questions_per_chunk = distribute_questions(num_questions, len(chunks))
     logger.info(f"Questions distribution: {questions_per_chunk}")
@@ -75,14 +104,17 @@ async def generate_quiz(content: str, difficulty: str, num_questions: int) -> Li
             continue
         
         logger.info(f"Processing chunk {i+1}/{len(chunks)}, generating {questions_per_chunk[i]} questions")
-        questions = await generate_from_chunk(groq, chunk, difficulty, questions_per_chunk[i])
+        if wait_for_capacity:
+            await wait_for_capacity()
+        questions = await generate_from_chunk(groq, chunk, difficulty, questions_per_chunk[i],
+                                              background=wait_for_capacity is not None)
+        # Provenance for the question bank (offsets into the content passed in)
+        for q in questions:
+            q.update(chunk_start=source_offset(offsets, spans[i][0]),
+                     chunk_end=source_offset(offsets, spans[i][1]),
+                     model=QUIZ_MODEL)
         all_questions.extend(questions)
         logger.info(f"Got {len(questions)} questions from chunk {i+1}")
-        
-        # Add delay between API calls to avoid rate limiting
-        if i < len(chunks) - 1:
-            import asyncio
-            await asyncio.sleep(2)
     
     logger.info(f"Total questions generated: {len(all_questions)}")
     return all_questions
@@ -93,22 +125,35 @@ def split_into_chunks(content: str, chunk_size: int) -> List[str]:
     if len(content) <= chunk_size:
         return [content]
     
-    chunks = []
-    words = content.split()
-    current_chunk = ""
+    return [" ".join(content[start:end].split()) for start, end in split_into_spans(content, chunk_size)]
+
+
+def split_into_spans(content: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Character offsets (start, end) in content of each chunk from split_into_chunks.
+    Chunks break on whitespace; their text joins the words with single spaces.
+    """
+    if len(content) <= chunk_size:
+        return [(0, len(content))]
+    
+    spans = []
+    start = end = None
+    length = 0
     
-    for word in words:
-        if len(current_chunk) + len(word) + 1 <= chunk_size:
-            current_chunk += " " + word if current_chunk else word
+    for word in re.finditer(r'\S+', content):
+        word_length = word.end() - word.start()
+        if start is not None and length + word_length + 1 <= chunk_size:
+            end = word.end()
+            length += word_length + 1
         else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = word
+            if start is not None:
+                spans.append((start, end))
+            start, end, length = word.start(), word.end(), word_length
     
-    if current_chunk:
-        chunks.append(current_chunk)
+    if start is not None:
+        spans.append((start, end))
     
-    return chunks
+    return spans
 
 
 def distribute_questions(total_questions: int, num_chunks: int) -> List[int]:
@@ -133,7 +178,8 @@ def distribute_questions(total_questions: int, num_chunks: int) -> List[int]:
     return distribution
 
 
-async def generate_from_chunk(groq, content: str, difficulty: str, num_questions: int) -> List[Dict[str, Any]]:
+async def generate_from_chunk(groq, content: str, difficulty: str, num_questions: int,
+                              background: bool = False) -> List[Dict[str, Any]]:
     """Generate questions from a single content chunk."""
     
     difficulty_instructions = {
@@ -172,8 +218,12 @@ The "correct" field should be the index (0-3) of the correct answer.
 Generate the quiz now:"""
 
     try:
-        response = groq.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        # Throttled, retried and run in a worker thread by the shared rate limiter
+        response = await limiter.call(
+            groq.chat.completions.create,
+            tokens=estimate_tokens(prompt) + 4000,
+            background=background,
+            model=QUIZ_MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=4000
@@ -186,11 +236,14 @@ Generate the quiz now:"""
         if json_match:
             questions = json.loads(json_match.group())
             
-            # Validate questions
+            # Validate questions (strictly - the quiz response skips pydantic re-validation)
             validated = []
             for q in questions[:num_questions]:
-                if ("question" in q and "options" in q and "correct" in q 
-                    and len(q["options"]) == 4 and 0 <= q["correct"] <= 3):
+                if (isinstance(q, dict)
+                    and isinstance(q.get("question"), str)
+                    and isinstance(q.get("options"), list) and len(q["options"]) == 4
+                    and all(isinstance(o, str) for o in q["options"])
+                    and type(q.get("correct")) is int and 0 <= q["correct"] <= 3):
                     validated.append({
                         "question": q["question"],
                         "options": q["options"],
@@ -205,6 +258,9 @@ Generate the quiz now:"""
     except json.JSONDecodeError as e:
         logger.error(f"JSON parse error: {e}")
         return []
+    except LLMUnavailableError:
+        # Surface rate limiting / outages instead of returning a short quiz
+        raise
     except Exception as e:
         logger.error(f"Chunk generation failed: {e}")
         return []
@@ -230,7 +286,9 @@ CORRECT ANSWER: {correct_answer}
 Provide a clear, concise explanation (2-3 sentences) that helps the student understand the concept better. Be encouraging but informative."""
 
     try:
-        response = groq.chat.completions.create(
+        response = await limiter.call(
+            groq.chat.completions.create,
+            tokens=estimate_tokens(prompt) + 300,
             model="llama-3.1-70b-versatile",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.5,
@@ -239,6 +297,9 @@ Provide a clear, concise explanation (2-3 sentences) that helps the student unde
         
         return response.choices[0].message.content.strip()
         
+    except LLMUnavailableError:
+        # Surface rate limiting / outages instead of a 200 with an error message
+        raise
     except Exception as e:
         logger.error(f"Explanation generation failed: {e}")
         return f"Unable to generate explanation: {str(e)}"
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# SQLite file holding every generated question
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "question_bank.db")
+# Questions served within this window are not served again
+RECENTLY_SERVED_SECONDS = int(os.getenv("QUESTION_BANK_RECENT_SECONDS", "3600"))
+
+# How far fetch_questions may look beyond the requested chapters
+SCOPES = ["chapters", "document", "topic"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    document_id TEXT,
+    document TEXT,
+    chapter_id TEXT,
+    chapter TEXT,
+    chunk_start INTEGER,
+    chunk_end INTEGER,
+    difficulty TEXT NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL,
+    last_served REAL NOT NULL DEFAULT 0,
+    UNIQUE (chapter_id, difficulty, question)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_chapter ON questions (chapter_id, difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_document ON questions (document_id, difficulty);
+"""
+
+# Full-text index over question text, options and chapter title, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+    question, options, chapter, content='questions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+    INSERT INTO questions_fts (rowid, question, options, chapter)
+    VALUES (new.id, new.question, new.options, new.chapter);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question, options, chapter)
+    VALUES ('delete', old.id, old.question, old.options, old.chapter);
+END;
+"""
+
+connection: Optional[sqlite3.Connection] = None
+lock = threading.Lock()
+FTS_AVAILABLE = False
+
+
+def get_connection() -> sqlite3.Connection:
+    """Open the bank (once) and create the schema if needed."""
+    global connection, FTS_AVAILABLE
+    if connection is None:
+        logger.info(f"Opening question bank at {QUESTION_BANK_PATH}")
+        connection = sqlite3.connect(QUESTION_BANK_PATH, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.executescript(SCHEMA)
+        try:
+            connection.executescript(FTS_SCHEMA)
+            FTS_AVAILABLE = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 not available, topic search falls back to LIKE: {e}")
+        connection.commit()
+    return connection
+
+
+def store_questions(questions: List[Dict[str, Any]], difficulty: str, chapter_id: str,
+                    chapter: Optional[str] = None, document_id: Optional[str] = None,
+                    document: Optional[str] = None, served_at: float = 0) -> int:
+    """
+    Save generated questions with their provenance. Duplicates are ignored.
+    chunk_start/chunk_end on each question are offsets into the chapter's content.
+    document_id is the content hash of the uploaded document; document is its filename.
+    served_at is when the questions were handed to a user (0 for pre-generated ones).
+    Blocking - call from async code with asyncio.to_thread.
+    Returns the number of new questions.
+    """
+    now = time.time()
+    rows = [
+        (
+            q["question"], json.dumps(q["options"]), q["correct"],
+            document_id, document, chapter_id, chapter,
+            q.get("chunk_start"), q.get("chunk_end"),
+            difficulty, q.get("model"), now, served_at
+        )
+        for q in questions
+    ]
+    with lock:
+        db = get_connection()
+        cursor = db.executemany(
+            """INSERT OR IGNORE INTO questions
+               (question, options, correct, document_id, document, chapter_id, chapter,
+                chunk_start, chunk_end, difficulty, model, created_at, last_served)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        db.commit()
+        added = cursor.rowcount
+    logger.info(f"Stored {added} new questions in bank (chapter {chapter_id}, {difficulty})")
+    return added
+
+
+def topic_query(topic: str) -> str:
+    """Turn free text into an FTS5 query matching any of its words."""
+    words = re.findall(r'\w+', topic)
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+def fetch_questions(difficulty: str, num_questions: int,
+                    chapter_ids: Optional[List[str]] = None,
+                    document_id: Optional[str] = None,
+                    topic: Optional[str] = None,
+                    scope: str = "chapters") -> List[Dict[str, Any]]:
+    """
+    Fill a quiz from the bank. Only the requested chapters are searched unless
+    scope widens it: "document" adds the rest of the same document, "topic" also
+    adds any document matching the topic. topic filters every level.
+    Recently served questions are skipped. Returned questions carry their bank "id";
+    pass those to mark_served once the quiz is actually sent.
+    Blocking - call from async code with asyncio.to_thread.
+    """
+    levels = []
+    if chapter_ids:
+        levels.append(("q.chapter_id IN (%s)" % ",".join("?" * len(chapter_ids)), list(chapter_ids)))
+    if scope in ("document", "topic") and document_id:
+        levels.append(("q.document_id = ?", [document_id]))
+    if scope == "topic" and topic:
+        levels.append(("1 = 1", []))
+
+    now = time.time()
+    selected: List[Dict[str, Any]] = []
+    seen = set()
+
+    with lock:
+        db = get_connection()
+        for condition, params in levels:
+            if len(selected) >= num_questions:
+                break
+
+            where = f"{condition} AND q.difficulty = ? AND q.last_served < ?"
+            params = params + [difficulty, now - RECENTLY_SERVED_SECONDS]
+            if topic and FTS_AVAILABLE and topic_query(topic):
+                sql = f"""SELECT q.* FROM questions_fts JOIN questions q ON q.id = questions_fts.rowid
+                          WHERE questions_fts MATCH ? AND {where}
+                          ORDER BY bm25(questions_fts) LIMIT ?"""
+                params = [topic_query(topic)] + params
+            elif topic:
+                sql = f"""SELECT q.* FROM questions q
+                          WHERE (q.question LIKE ? OR q.chapter LIKE ?) AND {where}
+                          ORDER BY random() LIMIT ?"""
+                params = [f"%{topic}%", f"%{topic}%"] + params
+            else:
+                sql = f"SELECT q.* FROM questions q WHERE {where} ORDER BY random() LIMIT ?"
+
+            for row in db.execute(sql, params + [num_questions + len(seen)]):
+                if row["id"] in seen or len(selected) >= num_questions:
+                    continue
+                seen.add(row["id"])
+                selected.append({
+                    "id": row["id"],
+                    "question": row["question"],
+                    "options": json.loads(row["options"]),
+                    "correct": row["correct"]
+                })
+
+    logger.info(f"Question bank supplied {len(selected)}/{num_questions} questions")
+    return selected
+
+
+def mark_served(question_ids: List[int], served_at: Optional[float] = None):
+    """
+    Exclude questions from fetch_questions for RECENTLY_SERVED_SECONDS.
+    Blocking - call from async code with asyncio.to_thread.
+    """
+    if not question_ids:
+        return
+    served_at = served_at or time.time()
+    with lock:
+        db = get_connection()
+        db.executemany("UPDATE questions SET last_served = ? WHERE id = ?",
+                       [(served_at, qid) for qid in question_ids])
+        db.commit()
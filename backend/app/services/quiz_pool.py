@@ -0,0 +1,192 @@
+import os
+import random
+import asyncio
+import hashlib
+import logging
+import itertools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.services.groq_service import generate_quiz, distribute_questions
+from app.services import question_bank
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Questions pre-generated per chapter and difficulty
+POOL_SIZE = int(os.getenv("QUIZ_POOL_SIZE", "10"))
+# Least recently used chapters are evicted past this limit
+MAX_POOLED_CHAPTERS = int(os.getenv("QUIZ_POOL_MAX_CHAPTERS", "200"))
+# How long the server must stay idle before a warming job starts
+IDLE_GRACE_SECONDS = float(os.getenv("QUIZ_POOL_IDLE_SECONDS", "2"))
+
+# Warmed in this order; medium is the default difficulty in the UI
+DIFFICULTIES = ["medium", "easy", "hard"]
+
+# (chapter_id, difficulty) -> questions
+pools: "OrderedDict[Tuple[str, str], List[Dict[str, Any]]]" = OrderedDict()
+
+queue: Optional[asyncio.PriorityQueue] = None
+worker: Optional[asyncio.Task] = None
+queued = set()
+sequence = itertools.count()
+
+# Interactive requests in flight; warming only runs while this is zero
+active_requests = 0
+idle: Optional[asyncio.Event] = None
+
+
+def chapter_id(content: str) -> str:
+    """Stable id for a chapter, derived from its content."""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def locate_chapters(content: str, chapter_ids: List[str]) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    Find (chapter id, start, end) of each chapter in content made by joining the
+    chapters' text with blank lines, as the frontend does. Chapters are matched by
+    hashing the content incrementally, one paragraph at a time.
+    Returns None if the content doesn't match the ids.
+    """
+    pieces = content.split("\n\n")
+    located = []
+    index = 0
+    start = 0
+    for cid in chapter_ids:
+        digest = hashlib.sha1()
+        end = start
+        first = True
+        while index < len(pieces):
+            if not first:
+                digest.update(b"\n\n")
+                end += 2
+            piece = pieces[index]
+            index += 1
+            first = False
+            digest.update(piece.encode("utf-8"))
+            end += len(piece)
+            if digest.hexdigest()[:16] == cid:
+                break
+        else:
+            return None
+        located.append((cid, start, end))
+        start = end + 2
+
+    # Leftover text means the content isn't exactly these chapters
+    if index != len(pieces):
+        return None
+    return located
+
+
+def get_idle_event() -> asyncio.Event:
+    global idle
+    if idle is None:
+        idle = asyncio.Event()
+        idle.set()
+    return idle
+
+
+@asynccontextmanager
+async def interactive_request():
+    """
+    Mark an interactive request as in flight so warming jobs wait for it.
+    """
+    global active_requests
+    active_requests += 1
+    get_idle_event().clear()
+    try:
+        yield
+    finally:
+        active_requests -= 1
+        if active_requests == 0:
+            get_idle_event().set()
+
+
+async def wait_for_idle():
+    """Block until no interactive request has been running for IDLE_GRACE_SECONDS."""
+    while True:
+        await get_idle_event().wait()
+        await asyncio.sleep(IDLE_GRACE_SECONDS)
+        if active_requests == 0:
+            return
+
+
+def enqueue_chapters(chapters: List[Dict[str, str]], document_id: Optional[str] = None,
+                     document: Optional[str] = None) -> List[str]:
+    """
+    Queue low-priority pool generation for each chapter at every difficulty.
+    Returns the ids of the queued chapters.
+    """
+    global queue, worker
+    if queue is None:
+        queue = asyncio.PriorityQueue()
+    if worker is None or worker.done():
+        worker = asyncio.get_running_loop().create_task(warm_pools())
+
+    queued_ids = []
+    for chapter in chapters:
+        content = chapter["content"]
+        if len(content) < 100:
+            continue
+
+        cid = chapter_id(content)
+        for priority, difficulty in enumerate(DIFFICULTIES):
+            key = (cid, difficulty)
+            if key in pools or key in queued:
+                continue
+            queued.add(key)
+            queue.put_nowait((priority, next(sequence), cid, difficulty, chapter, document_id, document))
+        queued_ids.append(cid)
+
+    logger.info(f"Queued pool warming for {len(queued_ids)} chapters ({queue.qsize()} jobs pending)")
+    return queued_ids
+
+
+async def warm_pools():
+    """Background worker: generate queued pools whenever the server is idle."""
+    while True:
+        _, _, cid, difficulty, chapter, document_id, document = await queue.get()
+        try:
+            logger.info(f"Warming pool for chapter {cid} ({difficulty})")
+            # Idle is rechecked before every LLM call, not just once per job
+            questions = await generate_quiz(chapter["content"], difficulty, POOL_SIZE,
+                                            wait_for_capacity=wait_for_idle)
+            if questions:
+                store_pool(cid, difficulty, questions)
+                await asyncio.to_thread(question_bank.store_questions, questions, difficulty, cid,
+                                        chapter["title"], document_id, document)
+        except Exception as e:
+            logger.error(f"Pool warming failed for chapter {cid} ({difficulty}): {e}")
+        finally:
+            queued.discard((cid, difficulty))
+            queue.task_done()
+
+
+def store_pool(cid: str, difficulty: str, questions: List[Dict[str, Any]]):
+    pools[(cid, difficulty)] = questions
+    pools.move_to_end((cid, difficulty))
+    while len(pools) > MAX_POOLED_CHAPTERS * len(DIFFICULTIES):
+        pools.popitem(last=False)
+    logger.info(f"Pool ready for chapter {cid} ({difficulty}): {len(questions)} questions")
+
+
+def sample_from_pool(chapter_ids: List[str], difficulty: str,
+                     num_questions: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Sample a quiz from the pre-built pools of the given chapters.
+    Returns None if any chapter's pool is missing or too small.
+    """
+    if not chapter_ids:
+        return None
+
+    questions = []
+    for cid, count in zip(chapter_ids, distribute_questions(num_questions, len(chapter_ids))):
+        pool = pools.get((cid, difficulty))
+        if pool is None or len(pool) < count:
+            return None
+        pools.move_to_end((cid, difficulty))
+        questions.extend(random.sample(pool, count))
+
+    random.shuffle(questions)
+    return questions
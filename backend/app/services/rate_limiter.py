@@ -0,0 +1,322 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Provider budgets shared by every LLM call in this process
+REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "20000"))
+
+# Retries: jittered exponential backoff, capped by a process-wide retry budget
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", "30"))
+RETRIES_PER_MINUTE = float(os.getenv("GROQ_RETRIES_PER_MINUTE", "10"))
+
+# A second copy of a call is started if the first is slower than this (0 disables)
+HEDGE_AFTER_SECONDS = float(os.getenv("GROQ_HEDGE_AFTER_SECONDS", "15"))
+
+# Background calls (pool warming) leave this fraction of each budget for interactive
+# calls and only start while no interactive call is waiting or running
+BACKGROUND_HEADROOM = float(os.getenv("GROQ_BACKGROUND_HEADROOM", "0.5"))
+BACKGROUND_POLL_SECONDS = 1.0
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GROQ_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("GROQ_BREAKER_RESET_SECONDS", "30"))
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the provider is down or rate limited beyond the retry budget."""
+
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute, holding at most capacity tokens."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self.refill()
+        return self.tokens
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Take tokens only if they are available right now."""
+        self.refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Wait (first come, first served) until the tokens are available. Returns the amount taken."""
+        # Larger than the bucket can ever hold - wait for a full bucket instead
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while not self.try_acquire(amount):
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+        return amount
+
+    def release(self, amount: float):
+        """Give back tokens that were reserved but not used."""
+        self.refill()
+        self.tokens = min(self.capacity, self.tokens + max(0.0, amount))
+
+
+class CircuitBreaker:
+    """Fails fast while the provider looks down; lets one probe through after the cooldown."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        # Half-open: allow a single probe call once the cooldown has passed
+        if self.retry_after() == 0 and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def end_probe(self):
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.probing:
+                logger.error(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+
+def used_tokens(response: Any) -> Optional[int]:
+    """Total tokens billed for an SDK response, if it reports usage."""
+    return getattr(getattr(response, "usage", None), "total_tokens", None)
+
+
+def status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def retry_after_header(error: Exception) -> Optional[float]:
+    """Read Retry-After (seconds) from an SDK error's HTTP response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """Timeouts, connection errors and 5xx count against the circuit breaker."""
+    code = status_code(error)
+    if code is not None:
+        return code >= 500
+    return (
+        isinstance(error, (TimeoutError, ConnectionError))
+        or type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+    )
+
+
+def is_retryable(error: Exception) -> bool:
+    return status_code(error) in (408, 409, 429) or is_provider_failure(error)
+
+
+class RateLimiter:
+    """
+    Process-wide gate for LLM calls: request and token budgets, 429-aware
+    retries with jittered backoff, hedging of slow calls and a circuit breaker.
+    """
+
+    def __init__(self):
+        self.requests = TokenBucket(REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(TOKENS_PER_MINUTE)
+        self.retries = TokenBucket(RETRIES_PER_MINUTE)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        # Set from Retry-After so every caller backs off, not just the one that got the 429
+        self.paused_until = 0.0
+        # Interactive calls waiting for budget or in flight
+        self.interactive = 0
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = retry_after_header(error)
+        if retry_after is not None:
+            return retry_after
+        # Full jitter
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    async def wait_for_pause(self, fail_fast: bool = False):
+        """
+        Sleep out a Retry-After pause. With fail_fast, pauses longer than we would ever
+        back off raise LLMUnavailableError instead, so interactive callers get a 503.
+        """
+        pause = self.paused_until - time.monotonic()
+        if pause <= 0:
+            return
+        if fail_fast and pause > BACKOFF_MAX_SECONDS:
+            raise LLMUnavailableError(f"LLM provider rate limited for {pause:.0f}s", retry_after=pause)
+        logger.info(f"Rate limiter paused, waiting {pause:.1f}s")
+        await asyncio.sleep(pause)
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait for request and token budget. Returns the tokens reserved."""
+        await self.wait_for_pause(fail_fast=True)
+        await self.requests.acquire(1)
+        return await self.tokens.acquire(tokens)
+
+    async def acquire_background(self, tokens: int) -> float:
+        """
+        Low-priority acquire: never holds the bucket locks (so interactive callers never
+        queue behind it), waits while any interactive call is active, and only takes
+        budget above the reserved headroom. Returns the tokens reserved.
+        """
+        tokens = min(tokens, self.tokens.capacity * (1 - BACKGROUND_HEADROOM))
+        while True:
+            await self.wait_for_pause()
+            if (self.interactive == 0
+                    and not self.requests.lock.locked() and not self.tokens.lock.locked()
+                    and self.requests.available() >= self.requests.capacity * BACKGROUND_HEADROOM + 1
+                    and self.tokens.available() >= self.tokens.capacity * BACKGROUND_HEADROOM + tokens):
+                self.requests.try_acquire(1)
+                self.tokens.try_acquire(tokens)
+                return tokens
+            await asyncio.sleep(BACKGROUND_POLL_SECONDS)
+
+    async def hedged(self, fn: Callable, tokens: int, **kwargs) -> Any:
+        """
+        Run fn in a worker thread; if it is still running after HEDGE_AFTER_SECONDS
+        and the budgets allow it, start a second copy and return whichever succeeds first.
+        """
+        first = asyncio.ensure_future(asyncio.to_thread(fn, **kwargs))
+        if HEDGE_AFTER_SECONDS <= 0:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=HEDGE_AFTER_SECONDS)
+        if done or not (self.requests.try_acquire(1) and self.tokens.try_acquire(tokens)):
+            return await first
+
+        logger.warning(f"LLM call slower than {HEDGE_AFTER_SECONDS}s, sending hedged request")
+        pending = {first, asyncio.ensure_future(asyncio.to_thread(fn, **kwargs))}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    # The losing thread can't be interrupted; its result is discarded
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def call(self, fn: Callable, tokens: int, background: bool = False, **kwargs) -> Any:
+        """
+        Call a blocking SDK function fn(**kwargs) under the shared limits.
+        tokens is the estimated prompt + completion size; whatever the response's
+        usage shows was not needed is returned to the token budget.
+        background calls use the low-priority acquire and are never hedged.
+        Raises LLMUnavailableError when the breaker is open or retries run out.
+        """
+        if background:
+            return await self.call_with_retries(fn, tokens, background, **kwargs)
+
+        self.interactive += 1
+        try:
+            return await self.call_with_retries(fn, tokens, background, **kwargs)
+        finally:
+            self.interactive -= 1
+
+    async def call_with_retries(self, fn: Callable, tokens: int, background: bool, **kwargs) -> Any:
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                raise LLMUnavailableError(
+                    "LLM provider unavailable (circuit open)",
+                    retry_after=self.breaker.retry_after()
+                )
+
+            # Set when this call is the half-open probe
+            probe = self.breaker.probing
+            try:
+                if background:
+                    reserved = await self.acquire_background(tokens)
+                else:
+                    reserved = await self.acquire(tokens)
+                try:
+                    if background:
+                        result = await asyncio.to_thread(fn, **kwargs)
+                    else:
+                        result = await self.hedged(fn, tokens, **kwargs)
+                except Exception as e:
+                    if is_provider_failure(e):
+                        self.breaker.record_failure()
+                    else:
+                        # A 429 or client error still proves the provider is reachable
+                        self.breaker.record_success()
+
+                    if not is_retryable(e):
+                        raise
+
+                    delay = self.backoff(attempt, e)
+                    if status_code(e) == 429:
+                        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+                    # Don't retry into an open breaker, past the retry budget or
+                    # when the provider asks us to wait longer than we would back off
+                    if (attempt == MAX_RETRIES or self.breaker.opened_at is not None
+                            or delay > BACKOFF_MAX_SECONDS or not self.retries.try_acquire(1)):
+                        raise LLMUnavailableError(f"LLM call failed after {attempt + 1} attempts: {e}",
+                                                  retry_after=max(delay, self.breaker.retry_after())) from e
+
+                    logger.warning(f"LLM call failed ({e}), retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                used = used_tokens(result)
+                if used is not None:
+                    # Completions rarely reach max_tokens - hand back the unused reservation
+                    self.tokens.release(reserved - used)
+                return result
+            finally:
+                if probe:
+                    # A cancelled probe records no outcome - let the next call probe again
+                    self.breaker.end_probe()
+
+
+# Shared by all LLM call sites
+limiter = RateLimiter()
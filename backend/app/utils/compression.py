@@ -0,0 +1,113 @@
+import os
+import gzip
+import asyncio
+import logging
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# Bodies larger than this are compressed in a worker thread to keep the event loop free
+COMPRESS_THREAD_SIZE = 256 * 1024
+# Fast settings: large JSON compresses well even at low levels
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+# Brotli is optional; probed on first use
+BROTLI_AVAILABLE = None
+
+
+def brotli_available() -> bool:
+    global BROTLI_AVAILABLE
+    if BROTLI_AVAILABLE is None:
+        try:
+            import brotli  # noqa: F401
+            BROTLI_AVAILABLE = True
+        except ImportError:
+            BROTLI_AVAILABLE = False
+            logger.warning("brotli not installed - falling back to gzip compression")
+    return BROTLI_AVAILABLE
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header (q=0 entries are refused)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip())
+
+    if "br" in accepted and brotli_available():
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip compression for single-message responses above a size threshold.
+    Streaming responses and already-encoded bodies are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know whether the body gets compressed
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+
+            if (message.get("more_body") or len(body) < self.minimum_size
+                    or "content-encoding" in headers):
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESS_THREAD_SIZE:
+                compressed = await asyncio.to_thread(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
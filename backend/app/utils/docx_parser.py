@@ -1,32 +1,120 @@
-from typing import Dict, List, Any
-from docx import Document
+import zipfile
+from typing import Dict, List, Any, Iterator, Tuple
+from xml.etree.ElementTree import iterparse
+
+# WordprocessingML namespace, as it appears in ElementTree tags
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Run children that contribute text (matches python-docx's Run.text)
+RUN_TEXT = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+
+
+def load_paragraph_styles(docx: zipfile.ZipFile) -> Tuple[Dict[str, str], str]:
+    """
+    Read styles.xml once and map paragraph style ids to lowercase style names.
+    Returns (styles, default style name).
+    """
+    styles = {}
+    default_style = ""
+    try:
+        styles_file = docx.open("word/styles.xml")
+    except KeyError:
+        return styles, default_style
+
+    with styles_file:
+        for _, elem in iterparse(styles_file):
+            if elem.tag != W + "style":
+                continue
+            if elem.get(W + "type") == "paragraph":
+                name = elem.find(W + "name")
+                style_name = name.get(W + "val", "").lower() if name is not None else ""
+                styles[elem.get(W + "styleId")] = style_name
+                if elem.get(W + "default") in ("1", "true"):
+                    default_style = style_name
+            elem.clear()
+
+    return styles, default_style
+
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (text, style name) for each top-level body paragraph of a Word document.
+    Reads word/document.xml incrementally instead of building a python-docx Document.
+    """
+    with zipfile.ZipFile(file_path) as docx:
+        styles, default_style = load_paragraph_styles(docx)
+
+        with docx.open("word/document.xml") as document:
+            stack = []
+            parts: List[str] = []
+            style_id = None
+
+            for event, elem in iterparse(document, events=("start", "end")):
+                if event == "start":
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                tag = elem.tag
+                depth = len(stack)
+
+                # Body paragraphs sit at document/body/p; table cells etc. are skipped
+                in_paragraph = depth >= 3 and stack[2].tag == W + "p" and stack[1].tag == W + "body"
+
+                if tag == W + "p" and depth == 2 and stack[1].tag == W + "body":
+                    style_name = styles.get(style_id, default_style) if style_id else default_style
+                    yield "".join(parts), style_name
+                    parts = []
+                    style_id = None
+                    stack[-1].remove(elem)
+                elif in_paragraph:
+                    parent = stack[-1].tag
+                    # Only runs directly in the paragraph or in a hyperlink carry text
+                    in_run = parent == W + "r" and (
+                        depth == 4 or (depth == 5 and stack[3].tag == W + "hyperlink")
+                    )
+                    if tag == W + "pStyle" and depth == 4:
+                        style_id = elem.get(W + "val")
+                    elif in_run:
+                        if tag == W + "t":
+                            parts.append(elem.text or "")
+                        elif tag == W + "br":
+                            if elem.get(W + "type", "textWrapping") == "textWrapping":
+                                parts.append("\n")
+                        elif tag in RUN_TEXT:
+                            parts.append(RUN_TEXT[tag])
+                elif depth == 2 and stack[1].tag == W + "body":
+                    # Tables, section properties, etc. - drop once parsed
+                    stack[-1].remove(elem)
 
 
 def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
     """
     Extract text from a Word document and detect chapters using heading styles.
     """
-    doc = Document(file_path)
-    full_text = ""
+    lines = []
     chapters = []
     current_chapter = None
     current_content = []
-    
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        
+
+    for text, style_name in iter_docx_paragraphs(file_path):
+        text = text.strip()
+
         if not text:
             continue
-        
+
         # Check if this is a heading (chapter/section)
-        style_name = para.style.name.lower() if para.style else ""
-        
         is_heading = (
             "heading" in style_name or
             "title" in style_name or
             text.lower().startswith(("chapter ", "unit ", "module ", "part "))
         )
-        
+
         if is_heading and len(text) < 100:  # Headings are usually short
             # Save previous chapter
             if current_chapter:
@@ -34,14 +122,14 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
                     "title": current_chapter,
                     "content": "\n".join(current_content)[:5000]
                 })
-            
+
             current_chapter = text
             current_content = []
         else:
             current_content.append(text)
-        
-        full_text += text + "\n"
-    
+
+        lines.append(text)
+
     # Save last chapter
     if current_chapter:
         chapters.append({
@@ -54,7 +142,9 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
             "title": "Full Document",
             "content": "\n".join(current_content)[:5000]
         })
-    
+
+    full_text = "".join(line + "\n" for line in lines)
+
     return {
         "text": full_text.strip(),
         "chapters": chapters if chapters else [{"title": "Full Document", "content": full_text[:5000]}]
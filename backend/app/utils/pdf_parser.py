@@ -1,31 +1,44 @@
 import re
 import logging
 from typing import Dict, List, Any
-from PyPDF2 import PdfReader
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# OCR imports (optional - will fallback gracefully if not available)
-try:
-    from pdf2image import convert_from_path
-    import pytesseract
-    OCR_AVAILABLE = True
-    logger.info("OCR dependencies loaded successfully")
-except ImportError:
-    OCR_AVAILABLE = False
-    logger.warning("OCR dependencies not available - scanned PDFs won't be supported")
+# OCR availability is probed on first use (see ocr_available()) so that
+# importing this module stays cheap on cold start
+OCR_AVAILABLE = None
+
+
+def ocr_available() -> bool:
+    """
+    Check (once) whether the optional OCR dependencies can be imported.
+    """
+    global OCR_AVAILABLE
+    if OCR_AVAILABLE is None:
+        try:
+            import pdf2image  # noqa: F401
+            import pytesseract  # noqa: F401
+            OCR_AVAILABLE = True
+            logger.info("OCR dependencies loaded successfully")
+        except ImportError:
+            OCR_AVAILABLE = False
+            logger.warning("OCR dependencies not available - scanned PDFs won't be supported")
+    return OCR_AVAILABLE
 
 
 def ocr_extract_text(file_path: str) -> str:
     """
     Extract text from PDF using OCR (for scanned documents).
     """
-    if not OCR_AVAILABLE:
+    if not ocr_available():
         logger.error("OCR not available - pytesseract/pdf2image not installed")
         return ""
     
+    from pdf2image import convert_from_path
+    import pytesseract
+    
     logger.info("Starting OCR extraction...")
     try:
         # Poppler path for Windows (fallback if not in PATH)
@@ -91,6 +104,8 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, Any]:
     Extract text from a PDF file and detect chapter boundaries.
     Uses PyPDF2 first, falls back to OCR for scanned documents.
     """
+    from PyPDF2 import PdfReader
+    
     logger.info("=" * 50)
     logger.info(f"PDF EXTRACTION STARTED: {file_path}")
     
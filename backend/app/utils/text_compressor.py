@@ -0,0 +1,209 @@
+import re
+import math
+import bisect
+import logging
+from collections import Counter
+from typing import List, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for Llama tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+# Running headers/footers: lines in the first/last EDGE_LINES lines of a page that
+# recur at the edges of at least REPEATED_LINE_MIN_COUNT pages and half of all pages
+EDGE_LINES = 2
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_LENGTH = 80
+# Shorter lines (answer keys, labels) are never dropped as duplicates
+DUPLICATE_LINE_MIN_LENGTH = 30
+
+# Whole-line page numbers at a page edge: "12", "Page 3 of 10", "- 4 -", or a short Roman numeral ("xiv")
+PAGE_NUMBER_PATTERN = re.compile(
+    r'^\s*(?:page\s+)?[-–—]?\s*(?:\d+|(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3}))\s*[-–—]?\s*(?:(?:of|/)\s*\d+)?\s*$',
+    re.IGNORECASE
+)
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+WORD_PATTERN = re.compile(r'[a-z][a-z0-9]+')
+# OCR garbage has no word-like run ("~ ' . ,", "| l ; i"); "x = 1" is kept for its "="
+ALNUM_RUN_PATTERN = re.compile(r'[^\W_]{2}')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of prompt tokens for a piece of text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def normalize_line(line: str, mask_digits: bool = False) -> str:
+    """
+    Normalize a line for duplicate detection (case, punctuation, spacing).
+    With mask_digits, "Physics - Page 12" and "Physics - Page 13" compare equal.
+    """
+    line = line.lower()
+    if mask_digits:
+        line = re.sub(r'\d+', '#', line)
+    line = re.sub(r'[^\w#]+', ' ', line)
+    return line.strip()
+
+
+def is_ocr_garbage(line: str) -> bool:
+    """Detect OCR garbage: no run of two letters or digits, and not an equation."""
+    return not ALNUM_RUN_PATTERN.search(line) and "=" not in line
+
+
+def split_pages(text: str) -> List[List[Tuple[int, str]]]:
+    """
+    Split text into pages of (offset in text, stripped line). Pages are separated by
+    form feeds or blank lines, which is how pdf_parser and OCR join page text.
+    """
+    pages = []
+    current = []
+    position = 0
+    # Same-length replacement keeps offsets valid
+    for raw in text.replace("\f", "\n").split("\n"):
+        line = raw.strip()
+        if line:
+            current.append((position + len(raw) - len(raw.lstrip()), line))
+        elif current:
+            pages.append(current)
+            current = []
+        position += len(raw) + 1
+    if current:
+        pages.append(current)
+    return pages
+
+
+def clean_text_with_offsets(text: str) -> Tuple[str, List[Tuple[int, int, int]]]:
+    """
+    Strip repeated headers/footers, page numbers, OCR noise and near-duplicate lines.
+    Paragraph breaks are preserved so chapter headings stay detectable.
+    Also returns (cleaned offset, source offset, length) for every kept line, for
+    mapping positions in the cleaned text back to the source (see source_offset()).
+    """
+    pages = split_pages(text)
+
+    def edge_lines(lines: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        # Blocks this short are paragraphs (e.g. worked examples), not pages
+        if len(lines) <= 2 * EDGE_LINES:
+            return []
+        return lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+
+    # Short lines recurring at page edges (ignoring page numbers) are running headers/footers
+    counts = Counter()
+    for lines in pages:
+        counts.update({
+            normalize_line(line, mask_digits=True) for _, line in edge_lines(lines)
+            if len(line) <= REPEATED_LINE_MAX_LENGTH
+        })
+    min_count = max(REPEATED_LINE_MIN_COUNT, len(pages) / 2)
+    boilerplate = {key for key, count in counts.items() if count >= min_count}
+
+    parts = []
+    offsets = []
+    position = 0
+    seen = set()
+    for lines in pages:
+        edges = set(range(min(EDGE_LINES, len(lines)))) | set(range(max(0, len(lines) - EDGE_LINES), len(lines)))
+        separator = "\n\n" if parts else ""
+        for index, (source, line) in enumerate(lines):
+            if (index in edges and len(lines) > 2 * EDGE_LINES
+                    and normalize_line(line, mask_digits=True) in boilerplate):
+                continue
+            if index in edges and PAGE_NUMBER_PATTERN.match(line):
+                continue
+            if is_ocr_garbage(line):
+                continue
+
+            key = normalize_line(line)
+            if len(line) >= DUPLICATE_LINE_MIN_LENGTH:
+                if key in seen:
+                    continue
+                seen.add(key)
+
+            position += len(separator)
+            parts.append(separator + line)
+            offsets.append((position, source, len(line)))
+            position += len(line)
+            separator = "\n"
+
+    result = "".join(parts)
+    logger.info(f"Cleaned text: {len(text)} -> {len(result)} chars")
+    return result, offsets
+
+
+def source_offset(offsets: List[Tuple[int, int, int]], position: int) -> int:
+    """Map a position in cleaned text back to the source text."""
+    index = bisect.bisect_right(offsets, (position, float("inf"), 0)) - 1
+    if index < 0:
+        return offsets[0][1] if offsets else position
+    cleaned, source, length = offsets[index]
+    return source + min(position - cleaned, length)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation and line breaks."""
+    sentences = []
+    for line in text.splitlines():
+        sentences.extend(s.strip() for s in SENTENCE_PATTERN.split(line) if s.strip())
+    return sentences
+
+
+def rank_sentences(sentences: List[str]) -> List[float]:
+    """
+    Score each sentence by TF-IDF salience, treating sentences as documents.
+    The score is the mean TF-IDF weight of the sentence's terms.
+    """
+    tokenized = [WORD_PATTERN.findall(s.lower()) for s in sentences]
+    num_sentences = len(sentences)
+
+    document_freq = Counter()
+    for words in tokenized:
+        document_freq.update(set(words))
+    idf = {
+        word: math.log((1 + num_sentences) / (1 + df)) + 1
+        for word, df in document_freq.items()
+    }
+
+    scores = []
+    for words in tokenized:
+        if not words:
+            scores.append(0.0)
+            continue
+        term_freq = Counter(words)
+        # Averaged over the sentence length so long sentences don't win
+        # just by having more terms
+        scores.append(sum(count * idf[word] for word, count in term_freq.items()) / len(words))
+    return scores
+
+
+def compress_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Keep the most salient sentences that fit in max_tokens, in original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    scores = rank_sentences(sentences)
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    selected = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+        length = len(sentences[index]) + 1
+        if used + length > budget:
+            continue
+        selected.append(index)
+        used += length
+
+    if not selected and sentences:
+        # No sentence fits (e.g. bullet or OCR text without sentence breaks):
+        # keep the start of the most salient one rather than an empty prompt
+        top = sentences[max(range(len(sentences)), key=lambda i: scores[i])]
+        return top[:budget].rsplit(" ", 1)[0] or top[:budget]
+
+    result = " ".join(sentences[i] for i in sorted(selected))
+    logger.info(f"Compressed to token budget {max_tokens}: {len(text)} -> {len(result)} chars")
+    return result
+
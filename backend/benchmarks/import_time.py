@@ -0,0 +1,88 @@
+"""
+Cold-start import benchmark for the backend.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+fails if a heavy optional dependency is imported eagerly or if the total
+import time goes over the budget.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py [--budget-ms 1500] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules that must only be loaded on first use or by the warm-up hook
+LAZY_MODULES = ["PyPDF2", "pdf2image", "pytesseract", "groq"]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(target: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Import `target` in a fresh interpreter.
+    Returns (total cumulative microseconds, {top-level package: cumulative us}).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr}")
+
+    packages: Dict[str, int] = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        # Only count top-level entries, nested ones are included in them
+        if depth == 1:
+            total += int(cumulative)
+        root = name.split(".")[0]
+        packages[root] = max(packages.get(root, 0), int(cumulative))
+    return total, packages
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    timings = []
+    packages: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total, packages = run_importtime(args.target)
+        timings.append(total / 1000)
+
+    best = min(timings)
+    print(f"import {args.target}: best {best:.1f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    print("Slowest top-level packages:")
+    for name, us in sorted(packages.items(), key=lambda x: -x[1])[:10]:
+        print(f"  {name:<20} {us / 1000:8.1f} ms")
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if m in packages]
+    if eager:
+        print(f"FAIL: heavy dependencies imported eagerly: {', '.join(eager)}")
+        failed = True
+    if best > args.budget_ms:
+        print(f"FAIL: import time {best:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
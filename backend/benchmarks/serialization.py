@@ -0,0 +1,108 @@
+"""
+Response serialization and compression benchmark.
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse, pydantic
+validation of QuizResponse) with the orjson fast path used by the routers, on a
+~5 MB /api/upload payload and a 50-question quiz, and reports gzip/brotli sizes.
+
+Usage (from the backend directory):
+    python benchmarks/serialization.py [--runs 20]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.routers.quiz import QuizResponse, quiz_response
+from app.utils.compression import compress, brotli_available
+
+PARAGRAPH = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll in the thylakoid membranes absorbs red and blue light. "
+)
+
+
+def upload_payload(size_mb: float = 5) -> dict:
+    """A /api/upload response with ~size_mb of chapter text."""
+    chapter_text = PARAGRAPH * 400  # ~50 KB per chapter
+    num_chapters = int(size_mb * 1024 * 1024 / len(chapter_text))
+    return {
+        "filename": "biology.pdf",
+        "total_chars": num_chapters * len(chapter_text),
+        "chapters": [
+            {"title": f"Chapter {i + 1}: Cells", "content": chapter_text, "id": f"{i:016x}"}
+            for i in range(num_chapters)
+        ],
+        "full_text": chapter_text[:1000] + "...",
+        "pregenerating": False
+    }
+
+
+def quiz_questions(num_questions: int = 50) -> List[dict]:
+    return [
+        {
+            "question": f"Question {i + 1}: where does the light reaction of photosynthesis happen?",
+            "options": ["Thylakoid", "Stroma", "Nucleus", "Ribosome"],
+            "correct": 0,
+            "chunk_start": 0,
+            "chunk_end": 15000,
+            "model": "llama-3.1-8b-instant"
+        }
+        for i in range(num_questions)
+    ]
+
+
+def best_ms(fn: Callable, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def report(name: str, baseline: float, fast: float):
+    print(f"  {name:<34} default {baseline:8.2f} ms   fast {fast:8.2f} ms   ({baseline / fast:.1f}x)")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    upload = upload_payload()
+    questions = quiz_questions()
+
+    print("Serialization (best of %d runs):" % args.runs)
+    report(
+        "upload response (~5 MB)",
+        best_ms(lambda: JSONResponse(jsonable_encoder(upload)), args.runs),
+        best_ms(lambda: ORJSONResponse(upload), args.runs),
+    )
+    report(
+        "quiz response (50 questions)",
+        best_ms(lambda: JSONResponse(jsonable_encoder(
+            QuizResponse(questions=questions, difficulty="medium", num_questions=len(questions))
+        )), args.runs),
+        best_ms(lambda: quiz_response(questions, "medium"), args.runs),
+    )
+
+    print("Compression of the upload response:")
+    body = ORJSONResponse(upload).body
+    encodings = ["gzip"] + (["br"] if brotli_available() else [])
+    for encoding in encodings:
+        compressed = compress(body, encoding)
+        ms = best_ms(lambda: compress(body, encoding), max(1, args.runs // 4))
+        print(f"  {encoding:<5} {len(body) / 1024:8.0f} KB -> {len(compressed) / 1024:6.0f} KB in {ms:7.2f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
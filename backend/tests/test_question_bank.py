@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import quiz
+from app.services import question_bank
+from app.services.quiz_pool import chapter_id
+from app.services.rate_limiter import LLMUnavailableError
+
+CONTENT = "Photosynthesis converts light energy into chemical energy stored in glucose. " * 5
+
+
+def make_questions(start, count):
+    return [
+        {"question": f"Question {i}?", "options": ["A", "B", "C", "D"], "correct": 0,
+         "chunk_start": 0, "chunk_end": len(CONTENT)}
+        for i in range(start, start + count)
+    ]
+
+
+class TempBankTestCase(unittest.TestCase):
+    """Points the question bank at a fresh database file for each test."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name, value in {
+            "QUESTION_BANK_PATH": os.path.join(directory.name, "bank.db"),
+            "connection": None,
+        }.items():
+            patcher = mock.patch.object(question_bank, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: question_bank.connection and question_bank.connection.close())
+
+
+class QuestionBankTest(TempBankTestCase):
+
+    def test_store_fetch_and_mark_served(self):
+        question_bank.store_questions(make_questions(0, 3), "medium", "chapter-a")
+        fetched = question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"])
+        self.assertEqual(len(fetched), 3)
+
+        # Fetching alone doesn't hide questions - only mark_served does
+        self.assertEqual(len(question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"])), 3)
+        question_bank.mark_served([q["id"] for q in fetched[:2]])
+        remaining = question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"])
+        self.assertEqual([q["question"] for q in remaining], [fetched[2]["question"]])
+
+    def test_served_at_excludes_stored_questions(self):
+        question_bank.store_questions(make_questions(0, 2), "medium", "chapter-a", served_at=1e12)
+        self.assertEqual(question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"]), [])
+
+    def test_fetch_is_limited_to_requested_chapters(self):
+        question_bank.store_questions(make_questions(0, 2), "medium", "chapter-a", document_id="doc")
+        question_bank.store_questions(make_questions(10, 2), "medium", "chapter-b", document_id="doc")
+        chapters = question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"], document_id="doc")
+        self.assertEqual(len(chapters), 2)
+        document = question_bank.fetch_questions("medium", 5, chapter_ids=["chapter-a"],
+                                                 document_id="doc", scope="document")
+        self.assertEqual(len(document), 4)
+
+
+class BankRoundTripTest(TempBankTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = TestClient(app)
+        self.generated = 0
+
+    def request(self, num_questions=3):
+        return self.client.post("/api/quiz/generate", json={
+            "content": CONTENT, "num_questions": num_questions, "use_bank": True
+        })
+
+    async def fake_generate_quiz(self, content, difficulty, num_questions, token_budget=None):
+        questions = make_questions(self.generated, num_questions)
+        self.generated += num_questions
+        return questions
+
+    def test_generated_questions_are_not_served_again(self):
+        with mock.patch.object(quiz, "generate_quiz", self.fake_generate_quiz):
+            first = self.request().json()["questions"]
+            second = self.request().json()["questions"]
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+        self.assertFalse({q["question"] for q in first} & {q["question"] for q in second})
+
+    def test_failed_shortfall_leaves_banked_questions_unserved(self):
+        question_bank.store_questions(make_questions(0, 2), "medium", chapter_id(CONTENT))
+
+        async def unavailable(**kwargs):
+            raise LLMUnavailableError("rate limited", retry_after=5)
+
+        with mock.patch.object(quiz, "generate_quiz", unavailable):
+            response = self.request()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "5")
+
+        with mock.patch.object(quiz, "generate_quiz", self.fake_generate_quiz):
+            served = self.request().json()["questions"]
+        self.assertIn("Question 0?", {q["question"] for q in served})
+        self.assertIn("Question 1?", {q["question"] for q in served})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import groq_service
+from app.services.rate_limiter import LLMUnavailableError
+
+EXPLANATION_REQUEST = {"question": "What is 2 + 2?", "user_answer": "5", "correct_answer": "4"}
+
+
+class ExplainAnswerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+        patcher = mock.patch.object(groq_service, "get_groq_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unavailable_provider_returns_503(self):
+        async def unavailable(*args, **kwargs):
+            raise LLMUnavailableError("circuit open", retry_after=12)
+
+        with mock.patch.object(groq_service.limiter, "call", unavailable):
+            response = self.client.post("/api/quiz/explain", json=EXPLANATION_REQUEST)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "12")
+
+    def test_explanation(self):
+        async def explain(*args, **kwargs):
+            message = SimpleNamespace(content=" Because 2 + 2 is 4. ")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        with mock.patch.object(groq_service.limiter, "call", explain):
+            response = self.client.post("/api/quiz/explain", json=EXPLANATION_REQUEST)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["explanation"], "Because 2 + 2 is 4.")
+
+
+if __name__ == "__main__":
+    unittest.main()
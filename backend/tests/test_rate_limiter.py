@@ -0,0 +1,194 @@
+import time
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.services import rate_limiter
+from app.services.rate_limiter import CircuitBreaker, LLMUnavailableError, RateLimiter
+
+
+class APIError(Exception):
+    """Stand-in for a Groq SDK status error."""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+def failing(error):
+    def fn(**kwargs):
+        raise error
+    return fn
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertGreater(breaker.retry_after(), 0)
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+    def test_probe_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_success()
+        self.assertIsNone(breaker.opened_at)
+        self.assertTrue(breaker.allow())
+
+    def test_probe_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker.opened_at = time.monotonic() - 31
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.probing)
+        self.assertFalse(breaker.allow())
+
+
+class RateLimiterTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patches = {
+            "HEDGE_AFTER_SECONDS": 0,
+            "BACKOFF_BASE_SECONDS": 0.01,
+            "BACKOFF_MAX_SECONDS": 1,
+            "MAX_RETRIES": 3,
+            "BREAKER_FAILURE_THRESHOLD": 2,
+            "BREAKER_RESET_SECONDS": 30,
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(rate_limiter, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.limiter = RateLimiter()
+
+    async def test_honors_retry_after(self):
+        calls = []
+
+        def fn(**kwargs):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise APIError(429, retry_after=0.2)
+            return "ok"
+
+        self.assertEqual(await self.limiter.call(fn, tokens=10), "ok")
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2)
+        self.assertGreater(self.limiter.paused_until, 0)
+
+    async def test_retry_after_beyond_backoff_cap_fails_fast(self):
+        with self.assertRaises(LLMUnavailableError) as raised:
+            await self.limiter.call(failing(APIError(429, retry_after=60)), tokens=10)
+        self.assertEqual(raised.exception.retry_after, 60)
+
+    async def test_long_pause_fails_fast_for_interactive_calls(self):
+        with self.assertRaises(LLMUnavailableError):
+            await self.limiter.call(failing(APIError(429, retry_after=60)), tokens=10)
+
+        calls = []
+        start = time.monotonic()
+        with self.assertRaises(LLMUnavailableError) as raised:
+            await self.limiter.call(lambda **kwargs: calls.append(1), tokens=10)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertGreater(raised.exception.retry_after, 59)
+        self.assertEqual(calls, [])
+
+    async def test_long_pause_still_holds_background_calls(self):
+        self.limiter.paused_until = time.monotonic() + 60
+        task = asyncio.create_task(self.limiter.call(lambda **kwargs: "ok", tokens=10, background=True))
+        await asyncio.sleep(0.05)
+        self.assertFalse(task.done())
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_unused_tokens_are_released(self):
+        capacity = self.limiter.tokens.capacity
+        response = SimpleNamespace(usage=SimpleNamespace(total_tokens=1000))
+        await self.limiter.call(lambda **kwargs: response, tokens=5000)
+        self.assertAlmostEqual(self.limiter.tokens.available(), capacity - 1000, delta=5)
+
+    async def test_release_is_capped_at_capacity(self):
+        bucket = self.limiter.tokens
+        bucket.release(bucket.capacity * 2)
+        self.assertEqual(bucket.available(), bucket.capacity)
+
+    async def test_retry_budget_limits_retries(self):
+        self.limiter.retries.tokens = 1
+        calls = []
+
+        def fn(**kwargs):
+            calls.append(1)
+            raise APIError(429)
+
+        with self.assertRaises(LLMUnavailableError):
+            await self.limiter.call(fn, tokens=10)
+        # One retry allowed by the budget, then it gives up
+        self.assertEqual(len(calls), 2)
+
+    async def test_client_errors_are_not_retried(self):
+        calls = []
+
+        def fn(**kwargs):
+            calls.append(1)
+            raise APIError(400)
+
+        with self.assertRaises(APIError):
+            await self.limiter.call(fn, tokens=10)
+        self.assertEqual(len(calls), 1)
+
+    async def test_open_breaker_fails_fast(self):
+        with self.assertRaises(LLMUnavailableError):
+            await self.limiter.call(failing(APIError(503)), tokens=10)
+        self.assertIsNotNone(self.limiter.breaker.opened_at)
+
+        calls = []
+        with self.assertRaises(LLMUnavailableError):
+            await self.limiter.call(lambda **kwargs: calls.append(1), tokens=10)
+        self.assertEqual(calls, [])
+
+    async def test_cancelled_probe_releases_half_open(self):
+        breaker = self.limiter.breaker
+        breaker.failures = 2
+        breaker.opened_at = time.monotonic() - 31
+        started = asyncio.Event()
+
+        async def slow_acquire(tokens):
+            started.set()
+            await asyncio.sleep(10)
+
+        with mock.patch.object(self.limiter, "acquire", slow_acquire):
+            task = asyncio.create_task(self.limiter.call(lambda **kwargs: "ok", tokens=10))
+            await started.wait()
+            self.assertTrue(breaker.probing)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertFalse(breaker.probing)
+        self.assertEqual(await self.limiter.call(lambda **kwargs: "ok", tokens=10), "ok")
+        self.assertIsNone(breaker.opened_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from app.utils.text_compressor import (
+    clean_text_with_offsets, compress_to_budget, is_ocr_garbage, source_offset
+)
+
+
+def clean(text):
+    return clean_text_with_offsets(text)[0]
+
+
+def page(number, body):
+    return f"Biology Grade 10\nChapter 2: Cells\n{body}\nCells are made of organelles.\nPage {number}"
+
+
+class CleanTextTest(unittest.TestCase):
+
+    def test_keeps_math_and_science_lines(self):
+        lines = [
+            "x = (a + b) / 2",
+            "(x + 1)(x - 1) = x^2 - 1",
+            "y = -b/(2a)",
+            "x = 1",
+            "H2O",
+            "CO2 + H2O -> C6H12O6 + O2",
+            "F = ma",
+            "pH",
+            "42",
+            "2019",
+        ]
+        text = "The equations below are used throughout the chapter.\n" + "\n".join(lines) + "\nEnd of section.\nSee the next page."
+        cleaned = clean(text).splitlines()
+        for line in lines:
+            self.assertIn(line, cleaned)
+
+    def test_ocr_garbage(self):
+        for line in ["~ ' . ,", "| l ; i", "- - _ -", "•"]:
+            self.assertTrue(is_ocr_garbage(line), line)
+        for line in ["y = -b/(2a)", "42", "ill", "x = 1"]:
+            self.assertFalse(is_ocr_garbage(line), line)
+
+    def test_page_numbers_only_at_page_edges(self):
+        text = "\n\n".join([
+            "12\nCells are the basic unit of life.\nMitochondria make ATP.\nThe answer is\n42\nas shown.\nEnd.",
+            "Plants use light to make sugar.\nChlorophyll is green.\nxiv",
+        ])
+        cleaned = clean(text).splitlines()
+        self.assertNotIn("12", cleaned)
+        self.assertNotIn("xiv", cleaned)
+        self.assertIn("42", cleaned)
+
+    def test_roman_numerals_only_as_standalone_tokens(self):
+        text = "Intro line one.\nThe civil war was ill timed.\nMore body text here.\nvi\nMore text.\nLast line.\nThe end."
+        cleaned = clean(text)
+        self.assertIn("civil", cleaned)
+        self.assertIn("vi", cleaned.splitlines())
+
+    def test_removes_running_headers_and_footers(self):
+        text = "\n\n".join(page(n, f"Body text of page {n} about cell membranes.") for n in range(1, 6))
+        cleaned = clean(text)
+        self.assertNotIn("Biology Grade 10", cleaned)
+        self.assertNotIn("Page 3", cleaned)
+        self.assertIn("Body text of page 3", cleaned)
+
+    def test_short_repeated_lines_are_kept(self):
+        text = "Example 1\nSolve it.\nAnswer: 5\n\nExample 2\nSolve it too.\nAnswer: 6\n\nExample 3\nAgain.\nAnswer: 7"
+        cleaned = clean(text)
+        for line in ["Example 1", "Example 3", "Answer: 5", "Answer: 7"]:
+            self.assertIn(line, cleaned)
+
+    def test_offsets_map_back_to_source(self):
+        text = "12\nCells divide by mitosis.\n\nxiv\nDNA is copied first."
+        cleaned, offsets = clean_text_with_offsets(text)
+        position = cleaned.index("DNA")
+        self.assertEqual(text[source_offset(offsets, position):].split("\n")[0], "DNA is copied first.")
+
+
+class CompressToBudgetTest(unittest.TestCase):
+
+    def test_short_text_unchanged(self):
+        self.assertEqual(compress_to_budget("Cells divide.", 100), "Cells divide.")
+
+    def test_never_empty(self):
+        text = "word " * 500
+        result = compress_to_budget(text, 10)
+        self.assertTrue(result)
+        self.assertLessEqual(len(result), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
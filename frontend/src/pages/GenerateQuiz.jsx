@@ -48,10 +48,13 @@ export default function GenerateQuiz() {
         setError(null);
 
         // Get content from selected chapters
-        const content = selectedTextbook.chapters
-            .filter(c => selectedChapters.includes(c.title))
+        const chapters = selectedTextbook.chapters
+            .filter(c => selectedChapters.includes(c.title));
+        const content = chapters
             .map(c => c.content)
             .join('\n\n');
+        // Chapter ids let the backend serve from pre-generated question pools
+        const chapterIds = chapters.every(c => c.id) ? chapters.map(c => c.id) : null;
 
         // DEBUG: Log what we're sending
         console.log('=== DEBUG: Quiz Generation Request ===');
@@ -71,6 +74,11 @@ export default function GenerateQuiz() {
                     content,
                     difficulty,
                     num_questions: numQuestions,
+                    chapter_ids: chapterIds,
+                    chapters: chapters.map(c => c.title),
+                    document_id: selectedTextbook.documentId,
+                    document: selectedTextbook.filename,
+                    use_bank: import.meta.env.VITE_USE_QUESTION_BANK === 'true',
                 }),
             });
 
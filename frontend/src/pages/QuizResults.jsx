@@ -54,6 +54,10 @@ export default function QuizResults() {
                 })
             });
 
+            if (!response.ok) {
+                throw new Error(`Explanation failed (${response.status})`);
+            }
+
             const data = await response.json();
             setExplanations(prev => ({ ...prev, [index]: data.explanation }));
         } catch (err) {
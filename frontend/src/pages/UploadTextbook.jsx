@@ -61,7 +61,9 @@ export default function UploadTextbook() {
         formData.append('file', file);
 
         try {
-            const response = await fetch(`${API_URL}/api/upload`, {
+            // Opt-in: have the backend pre-generate question pools while idle
+            const pregenerate = import.meta.env.VITE_PREGENERATE_QUIZZES === 'true';
+            const response = await fetch(`${API_URL}/api/upload${pregenerate ? '?pregenerate=true' : ''}`, {
                 method: 'POST',
                 body: formData,
             });
@@ -78,6 +80,7 @@ export default function UploadTextbook() {
             textbooks.push({
                 id: Date.now().toString(),
                 filename: result.filename,
+                documentId: result.document_id,
                 chapters: result.chapters,
                 fullText: result.full_text,
                 uploadedAt: new Date().toISOString()